@@ -8,6 +8,9 @@
 
 set -xeuo pipefail
 
+# Model modules are loaded from the test directories, so run the real weight
+# model tests with `pytest ... --compiled-modules-in-test-dirs` first.
+
 THIS_DIR="$(cd $(dirname $0) && pwd)"
 IREE_ROOT="$(cd ${THIS_DIR?}/.. && pwd)"
 VAE_DECODE_DIR="${IREE_ROOT?}/pytorch/models/sdxl-vae-decode-tank"
@@ -6,13 +6,18 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import argparse
+import functools
+import hashlib
 import logging
 import pyjson5
 import os
 import pytest
+import shlex
+import shutil
 import subprocess
+import tempfile
 
 
 # --------------------------------------------------------------------------- #
@@ -30,9 +35,14 @@ def pytest_addoption(parser):
     #     "skip_compile_tests": list of str,
     #     "skip_run_tests": list of str,
     #     "expected_compile_failures": list of str,
-    #     "expected_run_failures": list of str
+    #     "expected_run_failures": list of str,
+    #     "compile_to_phase": str (optional)
     #   }
     #
+    # If "compile_to_phase" is set (e.g. "global-optimization"), compilation
+    # stops after that phase using `iree-compile --compile-to=` and tests only
+    # check that compilation succeeds, skipping the 'run' stage.
+    #
     # For example, to test on CPU with the `llvm-cpu` backend and `local-task` device:
     #   {
     #     "config_name": "cpu_llvm_task",
@@ -88,6 +98,62 @@ def pytest_addoption(parser):
         help="Skips any tests that are missing required files",
     )
 
+    # Compiled modules are written to a cache directory, keyed by a hash of the
+    # compiler version, the compile command, and the contents of input files.
+    # The directory can be specified in (by order of preference):
+    #   1. The `--compile-cache-dir` argument
+    #   2. The `IREE_TEST_CACHE_DIR` environment variable
+    #       e.g. a tmpfs path like `/dev/shm/iree-tests` to avoid slow disks
+    #   3. `$XDG_CACHE_HOME/iree-tests`, defaulting to `~/.cache/iree-tests`
+    default_compile_cache_dir = os.getenv("IREE_TEST_CACHE_DIR", default="")
+    if not default_compile_cache_dir:
+        default_compile_cache_dir = os.path.join(
+            os.getenv("XDG_CACHE_HOME", default="~/.cache"), "iree-tests"
+        )
+    parser.addoption(
+        "--compile-cache-dir",
+        action="store",
+        default=default_compile_cache_dir,
+        help="Directory to write compiled modules to and reuse them from",
+    )
+
+    parser.addoption(
+        "--compile-cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Reuses compiled modules from previous runs if the compiler and inputs are unchanged",
+    )
+
+    # Scripts like benchmarks/benchmark_sdxl_rocm.sh load compiled modules from
+    # the test directories, as '{input_mlir_stem}_{test_name}.vmfb'.
+    parser.addoption(
+        "--compiled-modules-in-test-dirs",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Also places compiled modules in test directories, linked or copied from the cache",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_cmdline_main(config):
+    # When running with pytest-xdist (`-n auto`) and no explicit `--dist` mode,
+    # default to `--dist=loadfile` instead of `--dist=load`. This keeps every
+    # test case and config for one program on the same worker, so large input
+    # files are read from a warm cache.
+    #
+    # This must run before pytest-xdist's own `pytest_cmdline_main`, which
+    # changes the default from 'no' to 'load'. The parsed value is 'no' both by
+    # default and for an explicit `--dist no`, so check the raw arguments too.
+    numprocesses = getattr(config.option, "numprocesses", None)
+    if not numprocesses or getattr(config.option, "dist", None) != "no":
+        return
+    args = list(config.invocation_params.args)
+    args += shlex.split(os.getenv("PYTEST_ADDOPTS", default=""))
+    args += config.getini("addopts")
+    if any(arg == "--dist" or arg.startswith("--dist=") for arg in args):
+        return
+    config.option.dist = "loadfile"
+
 
 def pytest_sessionstart(session):
     session.config.iree_test_configs = []
@@ -106,8 +172,38 @@ def pytest_sessionstart(session):
             check_field("iree_compile_flags")
             check_field("iree_run_module_flags")
 
+            compile_to_phase = test_config.get("compile_to_phase")
+            if compile_to_phase is not None and (
+                not isinstance(compile_to_phase, str) or not compile_to_phase
+            ):
+                raise ValueError(
+                    f"config file '{config_file}' has an invalid 'compile_to_phase' field (expected a non-empty string)"
+                )
+
+            # Test names are looked up in these lists for every test that is
+            # collected, so convert them to sets.
+            for field_name in [
+                "skip_compile_tests",
+                "skip_run_tests",
+                "expected_compile_failures",
+                "expected_run_failures",
+            ]:
+                test_config[field_name] = frozenset(test_config.get(field_name, []))
+
             session.config.iree_test_configs.append(test_config)
 
+    compile_cache_dir = session.config.getoption("compile_cache_dir")
+    compile_cache_dir = Path(os.path.expanduser(compile_cache_dir)).resolve()
+    compile_cache_dir.mkdir(parents=True, exist_ok=True)
+    session.config.iree_compile_cache_dir = compile_cache_dir
+
+    # Failed compiles are not written to the cache directory, but are remembered
+    # for the rest of the session, keyed by the same cache key, along with the
+    # node ID of the test that failed. Configs sharing the same compile flags
+    # then only compile a failing program once, while reruns of the same test
+    # (e.g. from pytest-retry) still compile again.
+    session.config.iree_compile_failures = {}
+
 
 def pytest_collect_file(parent, file_path):
     if not file_path.name.endswith("_spec.mlir") and (
@@ -115,10 +211,135 @@ def pytest_collect_file(parent, file_path):
     ):
         return MlirFile.from_parent(parent, path=file_path)
 
+
+# --------------------------------------------------------------------------- #
+# Compiled module cache
+
+
+@functools.cache
+def get_iree_compile_version():
+    """Returns a string identifying the `iree-compile` binary on the PATH."""
+    iree_compile_path = shutil.which("iree-compile")
+    if not iree_compile_path:
+        return ""
+
+    # Local builds may not change the version string between rebuilds, so
+    # include the binary's location and modification time too.
+    iree_compile_stat = os.stat(iree_compile_path)
+    proc = subprocess.run([iree_compile_path, "--version"], capture_output=True)
+    return (
+        f"{iree_compile_path} {iree_compile_stat.st_mtime_ns} {iree_compile_stat.st_size}\n"
+        + proc.stdout.decode("utf-8", errors="replace")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_file_digest(file_path: Path, mtime_ns: int, size: int):
+    """Returns a digest of the contents of the file at `file_path`.
+
+    Results are memoized on the file's modification time and size, so an input
+    shared by several test cases and configs is only read and hashed once.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def get_compile_cache_key(cwd: Path, compile_args: List[str]):
+    """Computes a cache key for the output of `iree-compile` with `compile_args`.
+
+    The key covers the compiler version, each argument, and the contents of the
+    files read by the command: the input program (positional arguments) and
+    flag values that contain a path separator, like transform dialect libraries
+    passed as `--iree-codegen-transform-dialect-library=path/to/spec.mlir`.
+    Identical programs in different test directories therefore share one
+    compiled module.
+    """
+    path_separators = tuple({"/", os.sep})
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(get_iree_compile_version().encode("utf-8"))
+    for arg in compile_args[1:]:
+        hasher.update(b"\0" + arg.encode("utf-8"))
+        if not arg.startswith("-"):
+            arg_value = arg
+        elif "=" in arg:
+            arg_value = arg.split("=", 1)[1]
+            if not any(separator in arg_value for separator in path_separators):
+                continue
+        else:
+            continue
+
+        # Flag values like pass pipelines can contain separators without being
+        # paths (and can be longer than the OS allows for file names).
+        arg_path = cwd / arg_value
+        try:
+            if not arg_path.is_file():
+                continue
+            arg_stat = arg_path.stat()
+        except OSError:
+            continue
+        hasher.update(
+            get_file_digest(arg_path, arg_stat.st_mtime_ns, arg_stat.st_size)
+        )
+    return hasher.hexdigest()
+
+
+# --------------------------------------------------------------------------- #
+# Subprocess helpers
+
+
+# Maximum number of bytes of output to keep from each stream of a failed process.
+# Diagnostics at the end of the output (the final error) are the most useful.
+MAX_LOG_OUTPUT_BYTES = 64 * 1024
+
+
+def read_log_file_tail(log_file, max_bytes=MAX_LOG_OUTPUT_BYTES):
+    """Reads up to the last `max_bytes` bytes from an open binary file."""
+    size = log_file.seek(0, os.SEEK_END)
+    if size <= max_bytes:
+        log_file.seek(0)
+        return log_file.read()
+    log_file.seek(size - max_bytes)
+    tail = log_file.read()
+    # Drop the partial line at the start of the tail.
+    tail = tail[tail.find(b"\n") + 1 :]
+    truncated_message = f"[... {size - len(tail)} bytes of output truncated ...]\n"
+    return truncated_message.encode("utf-8") + tail
+
+
+def decode_output(output):
+    """Decodes output from a CompletedProcess for display."""
+    if isinstance(output, bytes):
+        return output.decode("utf-8", errors="replace")
+    return str(output)
+
+
+def run_with_log_files(args, **kwargs):
+    """Runs a subprocess with its output redirected to temporary files.
+
+    `args` should be a list of arguments. Processes are launched directly rather
+    than through a shell, which would add a second process launch per command.
+
+    Tools like `iree-compile` can write megabytes of diagnostics. Rather than
+    buffering all of that in memory through pipes, output is written to disk and
+    only read back into the returned `CompletedProcess` if the process failed,
+    keeping at most the last `MAX_LOG_OUTPUT_BYTES` bytes of each stream.
+    """
+    with tempfile.TemporaryFile() as stdout_file:
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.run(args, stdout=stdout_file, stderr=stderr_file, **kwargs)
+            if proc.returncode != 0:
+                proc.stdout = read_log_file_tail(stdout_file)
+                proc.stderr = read_log_file_tail(stderr_file)
+    return proc
+
+
 # --------------------------------------------------------------------------- #
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IreeCompileAndRunTestSpec:
     """Specification for an IREE "compile and run" test."""
 
@@ -160,6 +381,10 @@ class IreeCompileAndRunTestSpec:
     # True to skip the test entirely (but still define it).
     skip_test: bool
 
+    # Compilation phase to stop after, e.g. "global-optimization", or None to
+    # compile all the way to a .vmfb. Tests with a phase set are not run.
+    compile_to_phase: Optional[str] = None
+
 
 class MlirFile(pytest.File):
     """Collector for MLIR files accompanied by input/output."""
@@ -180,7 +405,17 @@ class MlirFile(pytest.File):
                     have_lfs_files = False
         return have_lfs_files
 
-    def check_for_remote_files(self, test_case_json):
+    def list_test_directory_files(self):
+        """Lists the names of files in the test directory.
+
+        This reads the directory once, instead of checking for each file
+        separately. Symlinks are followed, so a symlink into a cache directory
+        with a missing target is not listed.
+        """
+        with os.scandir(self.path.parent) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+
+    def check_for_remote_files(self, test_case_json, test_directory_files):
         """Checks if all remote_files in a JSON test case exist on disk."""
         if "remote_files" not in test_case_json:
             return True
@@ -188,7 +423,7 @@ class MlirFile(pytest.File):
         have_all_files = True
         for remote_file_url in test_case_json["remote_files"]:
             remote_file = remote_file_url.rsplit("/", 1)[-1]
-            if not (self.path.parent / remote_file).exists():
+            if remote_file not in test_directory_files:
                 test_case_name = test_case_json["name"]
                 print(
                     f"Missing file '{remote_file}' for test {self.path.parent.name}::{test_case_name}"
@@ -202,9 +437,10 @@ class MlirFile(pytest.File):
 
         skip_missing = self.config.getoption("skip_tests_missing_files")
         have_lfs_files = self.check_for_lfs_files()
+        test_directory_files = self.list_test_directory_files()
 
         test_data_flagfile_name = "test_data_flags.txt"
-        if (self.path.parent / test_data_flagfile_name).exists():
+        if test_data_flagfile_name in test_directory_files:
             test_cases.append(
                 MlirFile.TestCase(
                     name="test",
@@ -213,14 +449,18 @@ class MlirFile(pytest.File):
                 )
             )
 
-        for test_cases_path in self.path.parent.glob("*.json"):
-            with open(test_cases_path) as f:
+        for test_cases_name in sorted(test_directory_files):
+            if not test_cases_name.endswith(".json"):
+                continue
+            with open(self.path.parent / test_cases_name) as f:
                 test_cases_json = pyjson5.load(f)
                 if test_cases_json.get("file_format", "") != "test_cases_v0":
                     continue
                 for test_case_json in test_cases_json["test_cases"]:
                     test_case_name = test_case_json["name"]
-                    have_remote_files = self.check_for_remote_files(test_case_json)
+                    have_remote_files = self.check_for_remote_files(
+                        test_case_json, test_directory_files
+                    )
                     have_all_files = have_lfs_files and have_remote_files
 
                     if not skip_missing and not have_all_files:
@@ -254,18 +494,21 @@ class MlirFile(pytest.File):
             return []
 
         for config in self.config.iree_test_configs:
-            if test_directory_name in config.get("skip_compile_tests", []):
+            if test_directory_name in config["skip_compile_tests"]:
                 continue
 
             expect_compile_success = self.config.getoption(
                 "ignore_xfails"
-            ) or test_directory_name not in config.get("expected_compile_failures", [])
+            ) or test_directory_name not in config["expected_compile_failures"]
             expect_run_success = self.config.getoption(
                 "ignore_xfails"
-            ) or test_directory_name not in config.get("expected_run_failures", [])
-            skip_run = self.config.getoption(
-                "skip_all_runs"
-            ) or test_directory_name in config.get("skip_run_tests", [])
+            ) or test_directory_name not in config["expected_run_failures"]
+            compile_to_phase = config.get("compile_to_phase")
+            skip_run = (
+                self.config.getoption("skip_all_runs")
+                or test_directory_name in config["skip_run_tests"]
+                or bool(compile_to_phase)
+            )
             config_name = config["config_name"]
 
             # TODO(scotttodd): don't compile once per test case?
@@ -284,6 +527,7 @@ class MlirFile(pytest.File):
                     expect_run_success=expect_run_success,
                     skip_run=skip_run,
                     skip_test=not test_case.enabled,
+                    compile_to_phase=compile_to_phase,
                 )
                 yield IreeCompileRunItem.from_parent(self, name=test_name, spec=spec)
 
@@ -311,15 +555,15 @@ class IreeCompileRunItem(pytest.Item):
 
         # TODO(scotttodd): swap cwd for a temp path?
         self.test_cwd = self.spec.test_directory
-        vmfb_name = f"{self.spec.input_mlir_stem}_{self.spec.test_name}.vmfb"
 
         self.compile_args = ["iree-compile", self.spec.input_mlir_name]
         self.compile_args.extend(self.spec.iree_compile_flags)
-        self.compile_args.extend(["-o", str(vmfb_name)])
+        if self.spec.compile_to_phase:
+            self.compile_args.append(f"--compile-to={self.spec.compile_to_phase}")
 
-        self.run_args = ["iree-run-module", f"--module={vmfb_name}"]
-        self.run_args.extend(self.spec.iree_run_module_flags)
-        self.run_args.append(f"--flagfile={self.spec.data_flagfile_name}")
+        # The output path depends on the contents of the input files, so it is
+        # computed when compiling (see test_compile) instead of during collection.
+        self.compiled_model_path = None
 
     def runtest(self):
         # TODO(scotttodd): log files needed by the test (remote files / git LFS)
@@ -369,6 +613,8 @@ class IreeCompileRunItem(pytest.Item):
             )
 
         self.test_compile()
+        if self.config.getoption("compiled_modules_in_test_dirs"):
+            self.place_compiled_model_in_test_dir()
 
         if self.spec.skip_run:
             return
@@ -386,8 +632,35 @@ class IreeCompileRunItem(pytest.Item):
             "IREE_TEST_PATH_EXTENSION", default=str(self.test_cwd)
         )
         path_extension = compile_env["IREE_TEST_PATH_EXTENSION"]
-        cmd = subprocess.list2cmdline(self.compile_args)
-        cmd = cmd.replace("${IREE_TEST_PATH_EXTENSION}", f"{path_extension}")
+        compile_args = [
+            arg.replace("${IREE_TEST_PATH_EXTENSION}", f"{path_extension}")
+            for arg in self.compile_args
+        ]
+
+        compile_cache_dir = self.config.iree_compile_cache_dir
+        cache_key = get_compile_cache_key(self.test_cwd, compile_args)
+        # Compiling to an intermediate phase outputs MLIR instead of a module.
+        output_suffix = ".mlir" if self.spec.compile_to_phase else ".vmfb"
+        self.compiled_model_path = compile_cache_dir / f"{cache_key}{output_suffix}"
+        cmd = subprocess.list2cmdline(
+            compile_args + ["-o", str(self.compiled_model_path)]
+        )
+
+        compile_failures = self.config.iree_compile_failures
+        if self.config.getoption("compile_cache"):
+            failed_nodeid, failed_proc = compile_failures.get(cache_key, (None, None))
+            if failed_proc is not None and failed_nodeid != self.nodeid:
+                logging.getLogger().info(
+                    f"Reusing earlier compile failure from '{failed_nodeid}' for:\n"
+                    f"cd {self.test_cwd} && {cmd}"
+                )
+                raise IreeCompileException(failed_proc, self.test_cwd, cmd)
+            if self.is_compiled_model_cached():
+                logging.getLogger().info(
+                    f"Reusing cached compile output '{self.compiled_model_path}' for:\n"
+                    f"cd {self.test_cwd} && {cmd}"
+                )
+                return
 
         # TODO(scotttodd): expand flagfile(s)
         logging.getLogger().info(
@@ -395,13 +668,75 @@ class IreeCompileRunItem(pytest.Item):
             f"cd {self.test_cwd} && {cmd}"
         )
 
-        proc = subprocess.run(cmd, env=compile_env, shell=True, capture_output=True, cwd=self.test_cwd)
-        if proc.returncode != 0:
-            raise IreeCompileException(proc, self.test_cwd)
+        # Compile to a temporary file then rename it into place, so concurrent
+        # workers and interrupted runs never leave a partial file in the cache.
+        temp_fd, temp_path = tempfile.mkstemp(
+            dir=compile_cache_dir, prefix=f"{cache_key}.", suffix=".tmp"
+        )
+        os.close(temp_fd)
+        try:
+            # Each compile runs in its own `iree-compile` process rather than
+            # through the in-process compiler API. Many test programs are
+            # expected to fail to compile and some crash the compiler, which
+            # must be reported as a test failure instead of taking down the
+            # pytest worker with it.
+            proc = run_with_log_files(
+                compile_args + ["-o", temp_path], env=compile_env, cwd=self.test_cwd
+            )
+            if proc.returncode != 0:
+                # Processes killed by a signal (negative return codes, e.g. from
+                # running out of memory) may pass if compiled again.
+                if proc.returncode > 0:
+                    compile_failures[cache_key] = (self.nodeid, proc)
+                raise IreeCompileException(proc, self.test_cwd, cmd)
+            # Identical programs share one cache entry, so another worker may
+            # have written (and may be running) the same file. Keep it rather
+            # than replacing it, which fails on Windows if the file is open.
+            # Without the cache, the existing file may be stale, so always
+            # replace it with the fresh output.
+            use_compile_cache = self.config.getoption("compile_cache")
+            if not (use_compile_cache and self.is_compiled_model_cached()):
+                try:
+                    os.replace(temp_path, self.compiled_model_path)
+                except PermissionError:
+                    if not (use_compile_cache and self.is_compiled_model_cached()):
+                        raise
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def place_compiled_model_in_test_dir(self):
+        """Places the compiled module in the test directory, next to its inputs.
+
+        A hard link to the cache entry is used if possible, falling back to a
+        copy if the cache directory is on a different filesystem. Outputs of
+        `compile_to_phase` are not placed, since they would be collected as
+        test inputs on the next run.
+        """
+        if self.spec.compile_to_phase:
+            return
+        module_path = (
+            self.test_cwd / f"{self.spec.input_mlir_stem}_{self.spec.test_name}.vmfb"
+        )
+        module_path.unlink(missing_ok=True)
+        try:
+            os.link(self.compiled_model_path, module_path)
+        except OSError:
+            shutil.copyfile(self.compiled_model_path, module_path)
+
+    def is_compiled_model_cached(self):
+        """Checks if a complete compiled output exists in the cache."""
+        return (
+            self.compiled_model_path.is_file()
+            and self.compiled_model_path.stat().st_size > 0
+        )
 
     def test_run(self):
         run_env = os.environ.copy()
-        cmd = subprocess.list2cmdline(self.run_args)
+        run_args = ["iree-run-module", f"--module={self.compiled_model_path}"]
+        run_args.extend(self.spec.iree_run_module_flags)
+        run_args.append(f"--flagfile={self.spec.data_flagfile_name}")
+        cmd = subprocess.list2cmdline(run_args)
 
         # TODO(scotttodd): expand flagfile(s)
         logging.getLogger().info(
@@ -409,18 +744,19 @@ class IreeCompileRunItem(pytest.Item):
             f"cd {self.test_cwd} && {cmd}"
         )
 
-        proc = subprocess.run(cmd, env=run_env, shell=True, capture_output=True, cwd=self.test_cwd)
+        proc = run_with_log_files(run_args, env=run_env, cwd=self.test_cwd)
         if proc.returncode != 0:
-            raise IreeRunException(proc, self.test_cwd, self.compile_args)
+            compile_args = self.compile_args + ["-o", str(self.compiled_model_path)]
+            raise IreeRunException(proc, self.test_cwd, compile_args)
 
     def repr_failure(self, excinfo):
         """Called when self.runtest() raises an exception."""
         if isinstance(excinfo.value, (IreeCompileException, IreeRunException)):
-            return "\n".join(excinfo.value.args)
+            return str(excinfo.value)
         if isinstance(excinfo.value, IreeXFailCompileRunException):
             return (
                 "Expected compile failure but run failed (move to 'expected_run_failures'):\n"
-                + "\n".join(excinfo.value.__cause__.args)
+                + str(excinfo.value.__cause__)
             )
         return super().repr_failure(excinfo)
 
@@ -434,52 +770,63 @@ class IreeCompileRunItem(pytest.Item):
 
 
 class IreeCompileException(Exception):
-    """Compiler exception that preserves the command line and error output."""
+    """Compiler exception that preserves the command line and error output.
 
-    def __init__(self, process: subprocess.CompletedProcess, cwd: str):
-        try:
-            errs = process.stderr.decode("utf-8")
-        except:
-            errs = str(process.stderr)  # Decode error or other: best we can do.
+    `cmd` is the command to show for reproducing the failure. This writes to the
+    final output path rather than the temporary file that was actually used.
+
+    The error output is only decoded when the exception is formatted.
+    """
+
+    def __init__(self, process: subprocess.CompletedProcess, cwd: str, cmd: str):
+        super().__init__(process, cwd, cmd)
+        self.process = process
+        self.cwd = cwd
+        self.cmd = cmd
 
-        super().__init__(
+    def __str__(self):
+        errs = decode_output(self.process.stderr)
+        return (
             f"Error invoking iree-compile\n"
-            f"Error code: {process.returncode}\n"
+            f"Error code: {self.process.returncode}\n"
             f"Stderr diagnostics:\n{errs}\n\n"
             f"Invoked with:\n"
-            f"  cd {cwd} && {process.args}\n\n"
+            f"  cd {self.cwd} && {self.cmd}\n\n"
         )
 
 
 class IreeRunException(Exception):
-    """Runtime exception that preserves the command line and error output."""
+    """Runtime exception that preserves the command line and error output.
+
+    The error output is only decoded when the exception is formatted.
+    """
 
     def __init__(
         self, process: subprocess.CompletedProcess, cwd: str, compile_args: List[str]
     ):
+        super().__init__(process, cwd, compile_args)
+        self.process = process
+        self.cwd = cwd
+        self.compile_args = compile_args
+
+    def __str__(self):
         # iree-run-module sends output to both stdout and stderr
-        try:
-            errs = process.stderr.decode("utf-8")
-        except:
-            errs = str(process.stderr)  # Decode error or other: best we can do.
-        try:
-            outs = process.stdout.decode("utf-8")
-        except:
-            outs = str(process.stdout)  # Decode error or other: best we can do.
+        errs = decode_output(self.process.stderr)
+        outs = decode_output(self.process.stdout)
 
-        compile_cmd = subprocess.list2cmdline(compile_args)
-        common_files_path = os.getenv("IREE_TEST_PATH_EXTENSION", default=cwd)
+        compile_cmd = subprocess.list2cmdline(self.compile_args)
+        common_files_path = os.getenv("IREE_TEST_PATH_EXTENSION", default=self.cwd)
         compile_cmd = compile_cmd.replace("${IREE_TEST_PATH_EXTENSION}", f"{common_files_path}")
 
-        super().__init__(
+        return (
             f"Error invoking iree-run-module\n"
-            f"Error code: {process.returncode}\n"
+            f"Error code: {self.process.returncode}\n"
             f"Stderr diagnostics:\n{errs}\n"
             f"Stdout diagnostics:\n{outs}\n"
             f"Compiled with:\n"
-            f"  cd {cwd} && {compile_cmd}\n\n"
+            f"  cd {self.cwd} && {compile_cmd}\n\n"
             f"Run with:\n"
-            f"  cd {cwd} && {process.args}\n\n"
+            f"  cd {self.cwd} && {subprocess.list2cmdline(self.process.args)}\n\n"
         )
 
 
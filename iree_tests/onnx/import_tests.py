@@ -12,6 +12,7 @@ from onnx import numpy_helper, version_converter
 import shutil
 import subprocess
 import numpy as np
+import os
 import sys
 from import_tests_utils import get_shape_string, write_io_bin
 
@@ -35,7 +36,10 @@ IMPORT_FAILURES_FILE = REPO_ROOT / "iree_tests/onnx/node/import_failures.txt"
 
 
 def find_onnx_tests(root_dir_path):
-    test_dir_paths = [p for p in root_dir_path.iterdir() if p.is_dir()]
+    # os.scandir() reports file types from the directory listing itself, so this
+    # avoids a separate stat() call per test directory (except for symlinks).
+    with os.scandir(root_dir_path) as entries:
+        test_dir_paths = [Path(entry.path) for entry in entries if entry.is_dir()]
     print(f"Found {len(test_dir_paths)} tests")
     return sorted(test_dir_paths)
 
@@ -56,7 +60,7 @@ def convert_io_proto(proto_filename, type_proto):
 
 def import_onnx_files_with_cleanup(test_dir_path):
     test_name = test_dir_path.name
-    imported_dir_path = Path(GENERATED_FILES_OUTPUT_ROOT) / test_name
+    imported_dir_path = GENERATED_FILES_OUTPUT_ROOT / test_name
     result = import_onnx_files(test_dir_path, imported_dir_path)
     if not result:
         # Note: could comment this out to keep partially imported directories.
@@ -122,7 +126,6 @@ def import_onnx_files(test_dir_path, imported_dir_path):
         #     f"  {imported_dir_path.name[5:]} import failed,\n    stdout: {ret.stdout},\n    stderr: {ret.stderr}",
         #     file=sys.stderr,
         # )
-        print(f"  {imported_dir_path.name[5:]} import failed", file=sys.stderr)
         return False
 
     test_data_dirs = sorted(test_dir_path.glob("test_data_set*"))
@@ -180,8 +183,9 @@ if __name__ == "__main__":
         "-j",
         "--jobs",
         type=int,
-        default=8,
-        help="Number of parallel processes to use when importing test cases",
+        default=os.cpu_count(),
+        help="Number of parallel processes to use when importing test cases "
+        "(defaults to the number of CPUs)",
     )
     args = parser.parse_args()
 
@@ -200,10 +204,13 @@ if __name__ == "__main__":
         results = pool.imap_unordered(
             import_onnx_files_with_cleanup, test_dir_paths
         )
+        # Report results from this (the parent) process as they arrive, so
+        # output from parallel workers is not interleaved.
         for result in results:
             if result[1]:
                 passed_imports.append(result[0])
             else:
+                print(f"  {result[0][5:]} import failed", file=sys.stderr)
                 failed_imports.append(result[0])
     print("******************************************************************")
 